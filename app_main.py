@@ -1,21 +1,23 @@
 # app_main.py
 import io
 import csv
-import shutil
+import hashlib
+import threading
 from pathlib import Path
 from typing import List, Optional
 
-from fastapi import FastAPI, UploadFile, File, Form
-from fastapi.responses import HTMLResponse, StreamingResponse, PlainTextResponse
+from fastapi import FastAPI, UploadFile, File, Form, Request, Response
+from fastapi.responses import HTMLResponse, StreamingResponse, PlainTextResponse, JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.concurrency import run_in_threadpool
 import uvicorn
 
-from matcher import match_resume_to_jds, match_many
+from matcher import match_resume_to_jds, match_many, prepare_jd_cache
 from jd_cache import load_or_build_jd_cache, build_jd_cache_from_uploads
+from shards import shard_urls, local_shard, shard_filter, scatter_match, merge_results
+from result_cache import result_cache, content_key, etag_for, etag_matches, has_errors
 
 APP_DIR = Path(__file__).resolve().parent
-UPLOAD_DIR = APP_DIR / "uploads"
-UPLOAD_DIR.mkdir(exist_ok=True)
 
 app = FastAPI(title="Resume–JD Matching Plugin")
 app.add_middleware(
@@ -50,25 +52,88 @@ def upload_page():
     return _serve_app_html()
 
 # -------- Lazy JD cache so startup is instant --------
+# On a sharded worker (SHARD_INDEX/SHARD_COUNT) only this worker's slice is
+# loaded. Embeddings, skill sets and locations are computed once, on first use.
 _jd_cache_fallback: Optional[dict] = None
+_jd_cache_fallback_version = ""
+_jd_cache_fallback_lock = threading.Lock()
 def _get_jd_cache_fallback() -> dict:
-    global _jd_cache_fallback
+    global _jd_cache_fallback, _jd_cache_fallback_version
     if _jd_cache_fallback is None:
-        try:
-            _jd_cache_fallback = load_or_build_jd_cache(
-                jd_dir=str(APP_DIR / "Dummy_data" / "JDS"),
-                cache_path=str(APP_DIR / "Dummy_data" / "jd_cache.json"),
-            )
-        except Exception:
-            _jd_cache_fallback = {}
+        with _jd_cache_fallback_lock:
+            if _jd_cache_fallback is None:
+                try:
+                    cache = load_or_build_jd_cache(
+                        jd_dir=str(APP_DIR / "Dummy_data" / "JDS"),
+                        cache_path=str(APP_DIR / "Dummy_data" / "jd_cache.json"),
+                        keep=shard_filter(*local_shard()),
+                    )
+                except Exception:
+                    cache = {}
+                try:
+                    prepare_jd_cache(cache)
+                except Exception:
+                    pass  # matching computes what is missing per request
+                _jd_cache_fallback_version = _corpus_version(cache)
+                _jd_cache_fallback = cache
     return _jd_cache_fallback
 
-def _jd_cache_from_uploads(jd_files: List[UploadFile] | None):
-    if not jd_files:
+def _corpus_version(cache: dict) -> str:
+    h = hashlib.sha256()
+    for name in sorted(cache):
+        h.update(f"{name}\0{cache[name].get('text') or ''}\0".encode("utf-8", "ignore"))
+    return h.hexdigest()[:16]
+
+def _fallback_version() -> str:
+    """Identifies the loaded fallback corpus in result keys."""
+    _get_jd_cache_fallback()
+    return _jd_cache_fallback_version
+
+def _jd_cache_from_uploads(named_bytes):
+    if not named_bytes:
         return None
-    named_bytes = [(f.filename, f.file.read()) for f in jd_files]
     return build_jd_cache_from_uploads(named_bytes)
 
+# -------- Content-keyed, single-flight results (see result_cache.py) --------
+async def _read_named(files: List[UploadFile] | None):
+    if not files:
+        return None
+    return [(f.filename, await f.read()) for f in files]
+
+def _not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+def _match_single(resume_name: str, resume_bytes: bytes, jd_named) -> dict:
+    import tempfile, os
+    # own directory per request: concurrent uploads may share a file name
+    with tempfile.TemporaryDirectory(prefix="upload_") as tmpdir:
+        resume_path = os.path.join(tmpdir, os.path.basename(resume_name or "resume"))
+        with open(resume_path, "wb") as out:
+            out.write(resume_bytes)
+        # Prefer uploaded JDs; fallback only if none uploaded
+        jd_cache = _jd_cache_from_uploads(jd_named) or _get_jd_cache_fallback()
+        return {"resume": os.path.basename(resume_path), "results": match_resume_to_jds(resume_path, jd_cache)}
+
+async def _single_results(request: Request, resume: UploadFile, jd_files: List[UploadFile] | None,
+                          variant: str):
+    """
+    (etag, JD rows) for /upload and /download_csv. Rows already produced by
+    /match-fast for the same resume and JD set are reused; otherwise both
+    endpoints share one "single" result. Rows are None when the result is
+    cached and the client's If-None-Match already names it.
+    """
+    resume_named = (resume.filename, await resume.read())
+    jd_named = await _read_named(jd_files)
+    corpus = await run_in_threadpool(_fallback_version) if jd_named is None else ""
+    key = content_key("single", [resume_named], jd_named, corpus)
+    etag = etag_for(key, variant)
+    block = result_cache.get(content_key("resume", [resume_named], jd_named, corpus)) or result_cache.get(key)
+    if block is not None and etag_matches(request.headers.get("if-none-match"), etag):
+        return etag, None
+    if block is None:
+        block = await result_cache.get_or_compute(key, _match_single, *resume_named, jd_named)
+    return etag, block.get("results") or []
+
 def _gaps_html(gaps):
     if not gaps:
         return "None"
@@ -82,18 +147,13 @@ def _periods_html(periods):
 # ---------- Original HTML workflow (one resume) ----------
 @app.post("/upload", response_class=HTMLResponse)
 async def handle_upload(
+    request: Request,
     resume: UploadFile = File(...),
-    jd_files: List[UploadFile] | None = File(None),
+    jd_files: List[UploadFile] = File([]),  # File(None) on an optional list 422s in FastAPI 0.110
 ):
-    # Save resume
-    resume_path = str(UPLOAD_DIR / resume.filename)
-    with open(resume_path, "wb") as out:
-        shutil.copyfileobj(resume.file, out)
-
-    # Prefer uploaded JDs; fallback only if none uploaded
-    jd_cache = _jd_cache_from_uploads(jd_files) or _get_jd_cache_fallback()
-
-    results = match_resume_to_jds(resume_path, jd_cache)
+    etag, results = await _single_results(request, resume, jd_files, "html")
+    if results is None:
+        return _not_modified(etag)
 
     rows_html = []
     for r in results:
@@ -131,19 +191,17 @@ async def handle_upload(
       {''.join(rows_html)}
     </table>
     """
-    return HTMLResponse(table, headers={"Cache-Control": "no-store"})
+    return HTMLResponse(table, headers={"Cache-Control": "no-cache", "ETag": etag})
 
 @app.post("/download_csv")
 async def download_csv(
+    request: Request,
     resume: UploadFile = File(...),
-    jd_files: List[UploadFile] | None = File(None),
+    jd_files: List[UploadFile] = File([]),  # File(None) on an optional list 422s in FastAPI 0.110
 ):
-    resume_path = str(UPLOAD_DIR / resume.filename)
-    with open(resume_path, "wb") as out:
-        shutil.copyfileobj(resume.file, out)
-
-    jd_cache = _jd_cache_from_uploads(jd_files) or _get_jd_cache_fallback()
-    results = match_resume_to_jds(resume_path, jd_cache)
+    etag, results = await _single_results(request, resume, jd_files, "csv")
+    if results is None:
+        return _not_modified(etag)
 
     output = io.StringIO()
     writer = csv.writer(output)
@@ -173,43 +231,138 @@ async def download_csv(
         media_type="text/csv",
         headers={
             "Content-Disposition": "attachment; filename=resume_match_results.csv",
-            "Cache-Control": "no-store",
+            "Cache-Control": "no-cache",
+            "ETag": etag,
         },
     )
 
 # ---------- FAST parallel endpoint (multi resume × multi JD) ----------
+def _match_fast_files(resume_named, jd_named, max_workers: int) -> list:
+    import tempfile, os
+    with tempfile.TemporaryDirectory(prefix="matchfast_") as tmpdir:
+        resume_paths, jd_paths = [], []
+
+        # one subdirectory per upload: two files may share a name but not a path
+        for i, (name, data) in enumerate(resume_named):
+            rp = os.path.join(tmpdir, f"r{i}", os.path.basename(name or "resume"))
+            os.makedirs(os.path.dirname(rp))
+            with open(rp, "wb") as w:
+                w.write(data)
+            resume_paths.append(rp)
+
+        for i, (name, data) in enumerate(jd_named):
+            jp = os.path.join(tmpdir, f"j{i}", os.path.basename(name or "jd"))
+            os.makedirs(os.path.dirname(jp))
+            with open(jp, "wb") as w:
+                w.write(data)
+            jd_paths.append(jp)
+
+        # one block per resume, in input order
+        return match_many(resume_paths, jd_paths, fast=True, max_workers=max_workers)
+
 @app.post("/match-fast")
 async def match_fast(
+    request: Request,
     resumes: List[UploadFile] = File(...),
     jds: List[UploadFile] = File(...),
-    max_workers: int = Form(4)
+    max_workers: int = Form(0)
 ):
     """
     Saves uploads into temp files; uses cached extraction + parallelism.
     Returns JSON the UI renders into cards.
     """
-    import tempfile, os
-    tmpdir = tempfile.mkdtemp(prefix="matchfast_")
-    try:
-        resume_paths, jd_paths = [], []
+    resume_named = await _read_named(resumes)
+    jd_named = await _read_named(jds)
+    # cached per resume, so /download_csv can reuse a resume's rows
+    keys = [content_key("resume", [rn], jd_named) for rn in resume_named]
+    results = [result_cache.get(k) for k in keys]
+    missing = [i for i, block in enumerate(results) if block is None]
+    etag = etag_for(content_key("fast", resume_named, jd_named), "json")
+    if not missing and etag_matches(request.headers.get("if-none-match"), etag):
+        return _not_modified(etag)
+    if missing:
+        todo = [resume_named[i] for i in missing]
+        computed = await result_cache.get_or_compute(
+            content_key("fast", todo, jd_named), _match_fast_files, todo, jd_named, max_workers,
+            store=False,
+        )
+        for i, block in zip(missing, computed):  # by position: names may repeat
+            results[i] = block
+            result_cache.put(keys[i], block)  # skips error blocks
+    headers = {"Cache-Control": "no-cache"}
+    if not has_errors(results):
+        headers["ETag"] = etag  # a copy with error blocks must not be revalidated later
+    return JSONResponse({"mode": "fast", "results": results}, headers=headers)
 
-        for uf in resumes:
-            rp = os.path.join(tmpdir, uf.filename)
-            with open(rp, "wb") as w:
-                w.write(await uf.read())
-            resume_paths.append(rp)
+# ---------- Sharded scatter-gather (coordinator + workers) ----------
+async def _save_uploads(tmpdir: str, files: List[UploadFile] | None, tag: str) -> List[str]:
+    """One subdirectory per file, so same-named uploads keep separate paths (and results)."""
+    import os
+    paths = []
+    for i, uf in enumerate(files or []):
+        p = os.path.join(tmpdir, f"{tag}{i}", os.path.basename(uf.filename or "upload"))
+        os.makedirs(os.path.dirname(p))
+        with open(p, "wb") as w:
+            w.write(await uf.read())
+        paths.append(p)
+    return paths
 
-        for uf in jds:
-            jp = os.path.join(tmpdir, uf.filename)
-            with open(jp, "wb") as w:
-                w.write(await uf.read())
-            jd_paths.append(jp)
+def _match_against_shard_corpus(resume_paths: List[str], max_workers: int) -> List[dict]:
+    # parallel, like uploaded JDs, against the prepared corpus slice
+    return match_many(resume_paths, [], True, max_workers, jd_cache=_get_jd_cache_fallback())
+
+@app.post("/shard/match")
+async def shard_match(
+    resumes: List[UploadFile] = File(...),
+    jds: List[UploadFile] = File([]),
+    max_workers: int = Form(0),
+):
+    """
+    Worker side of /match-sharded: matches the resumes against the JD slice
+    sent by the coordinator, or against this worker's slice of the fallback
+    corpus when no JDs are sent.
+    """
+    import tempfile
+    with tempfile.TemporaryDirectory(prefix="shard_") as tmpdir:
+        resume_paths = await _save_uploads(tmpdir, resumes, "r")
+        jd_paths = await _save_uploads(tmpdir, jds, "j")
+        if jd_paths:
+            results = await run_in_threadpool(match_many, resume_paths, jd_paths, True, max_workers)
+        else:
+            results = await run_in_threadpool(_match_against_shard_corpus, resume_paths, max_workers)
+    return {"mode": "shard", "shard": list(local_shard()), "results": results}
+
+@app.post("/match-sharded")
+async def match_sharded(
+    resumes: List[UploadFile] = File(...),
+    jds: List[UploadFile] = File([]),
+    max_workers: int = Form(0),
+    top_k: int = Form(0),
+):
+    """
+    Coordinator: scatters to MATCH_SHARD_URLS and merges per-shard results
+    (top_k > 0 keeps only the best k JDs per resume). Runs locally when no
+    shards are configured.
+    """
+    urls = shard_urls()
+    if not urls:
+        import tempfile
+        with tempfile.TemporaryDirectory(prefix="matchsharded_") as tmpdir:
+            resume_paths = await _save_uploads(tmpdir, resumes, "r")
+            jd_paths = await _save_uploads(tmpdir, jds, "j")
+            if jd_paths:
+                results = await run_in_threadpool(match_many, resume_paths, jd_paths, True, max_workers)
+            else:
+                results = await run_in_threadpool(_match_against_shard_corpus, resume_paths, max_workers)
+        # same ranking and top_k trimming as the sharded merge
+        return {"mode": "local", "results": merge_results([list(enumerate(results))], top_k=top_k)}
 
-        results = match_many(resume_paths, jd_paths, fast=True, max_workers=max_workers)
-        return {"mode": "fast", "results": results}
-    finally:
-        # (optional) clean up tmpdir later; keeping for debugging is fine
-        pass
+    resume_bytes = [(uf.filename, await uf.read()) for uf in resumes]
+    jd_bytes = [(uf.filename, await uf.read()) for uf in jds or []]
+    results = await run_in_threadpool(
+        scatter_match, resume_bytes, jd_bytes, urls, max_workers, top_k
+    )
+    return {"mode": "sharded", "shards": len(urls), "results": results}
 
 if __name__ == "__main__":
     uvicorn.run("app_main:app", host="127.0.0.1", port=8001, reload=False)
@@ -0,0 +1,81 @@
+"""
+Precision / recall of ``extract_skills_fast`` against SkillNer's
+``extract_skills`` on a document corpus, plus per-document timings.
+
+    python bench_skills.py                      # Dummy_data JDs + jd_cache.json
+    python bench_skills.py resumes/ jds/ a.pdf  # any files or directories
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Dict, List
+
+from extractors import (
+    extract_text,
+    extract_skills,
+    extract_skills_fast,
+    _extract_skills_tokens,
+    _skill_trie,
+    normalize_skills,
+)
+
+APP_DIR = Path(__file__).resolve().parent
+EXTS = {".pdf", ".docx", ".txt"}
+
+def load_corpus(paths: List[str]) -> Dict[str, str]:
+    docs: Dict[str, str] = {}
+    if not paths:
+        cache = APP_DIR / "Dummy_data" / "jd_cache.json"
+        if cache.exists():
+            for name, entry in json.loads(cache.read_text(encoding="utf-8")).items():
+                docs[name] = entry.get("text", "") or ""
+        paths = [str(APP_DIR / "Dummy_data" / "JDS")]
+    for raw in paths:
+        p = Path(raw)
+        files = sorted(p.iterdir()) if p.is_dir() else [p]
+        for f in files:
+            if f.is_file() and f.suffix.lower() in EXTS:
+                docs.setdefault(f.name, extract_text(str(f)))
+    return docs
+
+def _score(ref: set, got: set) -> Dict[str, int]:
+    return {"tp": len(ref & got), "fp": len(got - ref), "fn": len(ref - got)}
+
+def _prf(tp: int, fp: int, fn: int):
+    p = tp / (tp + fp) if tp + fp else 0.0
+    r = tp / (tp + fn) if tp + fn else 0.0
+    f = 2 * p * r / (p + r) if p + r else 0.0
+    return p, r, f
+
+def run(docs: Dict[str, str]) -> None:
+    extractors = {"vocab (fast)": extract_skills_fast, "tokens (old fast)": _extract_skills_tokens}
+    totals = {k: {"tp": 0, "fp": 0, "fn": 0, "secs": 0.0} for k in extractors}
+    ref_secs = 0.0
+    if _skill_trie() is None:  # also loads it outside the timed loop
+        raise SystemExit("no skill vocabulary; build it first with `python skill_vocab.py`")
+    for name, text in docs.items():
+        t0 = time.perf_counter()
+        ref = normalize_skills(extract_skills(text))
+        ref_secs += time.perf_counter() - t0
+        for label, fn in extractors.items():
+            t0 = time.perf_counter()
+            got = normalize_skills(fn(text))
+            totals[label]["secs"] += time.perf_counter() - t0
+            for k, v in _score(ref, got).items():
+                totals[label][k] += v
+
+    n = max(1, len(docs))
+    print(f"documents: {len(docs)}   reference extract_skills: {ref_secs / n * 1000:.1f} ms/doc")
+    print(f"{'extractor':<20}{'precision':>10}{'recall':>10}{'f1':>10}{'ms/doc':>10}")
+    for label, t in totals.items():
+        p, r, f = _prf(t["tp"], t["fp"], t["fn"])
+        print(f"{label:<20}{p:>10.3f}{r:>10.3f}{f:>10.3f}{t['secs'] / n * 1000:>10.2f}")
+
+if __name__ == "__main__":
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("paths", nargs="*", help="files or directories (.pdf/.docx/.txt)")
+    args = ap.parse_args()
+    run(load_corpus(args.paths))
@@ -8,6 +8,13 @@ import docx
 from dateutil import parser as dparser
 from datetime import datetime as _DT_
 import os  # (added for caching below)
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+log = logging.getLogger(__name__)
 
 # ---------- Lazy SkillNer (no predefined keyword lists) ----------
 @lru_cache(maxsize=1)
@@ -79,8 +86,7 @@ STOP = set("""
 a an the and or for with of on in to from by about into over than after before during under again further then once here there all any both each few more most other some such no nor not only own same so too very
 """.split())
 
-@lru_cache(maxsize=512)
-def extract_skills_fast(text: str) -> list[str]:
+def _extract_skills_tokens(text: str) -> list[str]:
     tokens = _WORD.findall(text or "")
     cand = []
     for t in tokens:
@@ -98,6 +104,56 @@ def extract_skills_fast(text: str) -> list[str]:
             out.append(c)
     return out
 
+# Vocabulary trie compiled from SKILL_DB by the build step (`python
+# skill_vocab.py`, run in the Dockerfile). It is only loaded here, never built:
+# importing SKILL_DB downloads it and writes files into the CWD. While the file
+# is missing, None (-> token heuristic) is returned and the load is retried.
+_TRIE_RETRY_SECS = 60.0
+_trie = None
+_trie_next_try = 0.0
+_trie_lock = threading.Lock()
+
+def _skill_trie():
+    global _trie, _trie_next_try
+    if _trie is not None:
+        return _trie
+    with _trie_lock:
+        if _trie is None and time.monotonic() >= _trie_next_try:
+            import skill_vocab
+            _trie = skill_vocab.load_vocab()
+            if _trie is None:
+                _trie_next_try = time.monotonic() + _TRIE_RETRY_SECS
+                log.warning("skill vocabulary %s missing or unreadable (run `python skill_vocab.py`); "
+                            "extract_skills_fast falls back to the token heuristic", skill_vocab.VOCAB_PATH)
+    return _trie
+
+def has_skill_vocab() -> bool:
+    return _skill_trie() is not None
+
+# Keyed by a digest of the text so the cache does not pin whole resumes.
+_FAST_SKILLS_MAX = 512
+_fast_skills_cache: "OrderedDict[bytes, tuple]" = OrderedDict()
+_fast_skills_lock = threading.Lock()
+
+def extract_skills_fast(text: str) -> list[str]:
+    key = hashlib.blake2b((text or "").encode("utf-8", "ignore"), digest_size=16).digest()
+    with _fast_skills_lock:
+        hit = _fast_skills_cache.get(key)
+        if hit is not None:
+            _fast_skills_cache.move_to_end(key)
+            return list(hit)
+    trie = _skill_trie()
+    if trie is not None:
+        from skill_vocab import scan
+        skills = tuple(scan(trie, text))
+    else:
+        skills = tuple(_extract_skills_tokens(text))
+    with _fast_skills_lock:
+        _fast_skills_cache[key] = skills
+        if len(_fast_skills_cache) > _FAST_SKILLS_MAX:
+            _fast_skills_cache.popitem(last=False)
+    return list(skills)
+
 def normalize_skills(skills: List[str]) -> set:
     out = set()
     for s in skills or []:
@@ -252,9 +308,11 @@ def _split_sections(text: str) -> Dict[str, List[str]]:
 def is_education_institution(s: str) -> bool:
     return bool(re.search(r"university|college|institute|school|bachelor|master|bsc|msc|ba|ma|phd|diploma", s, re.I))
 
-def extract_resume_data(text: str):
+def extract_resume_data(text: str, skills: List[str] | None = None):
+    """``skills`` may be passed in when extracted another way (fast mode)."""
     sections = _split_sections(text)
-    skills = extract_skills(text)
+    if skills is None:
+        skills = extract_skills(text)
 
     edu_lines = list(sections.get("education", []))
     edu_lines += [ln for ln in sections.get("misc", []) if is_education_institution(ln)]
@@ -1,7 +1,7 @@
 from __future__ import annotations
 import json
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 
 def _read_text_any(p: Path) -> str:
     s = p.suffix.lower()
@@ -17,32 +17,56 @@ def _read_text_any(p: Path) -> str:
         return docx2txt.process(str(p)) or ""
     return p.read_text(encoding="utf-8", errors="ignore")
 
-def load_or_build_jd_cache(jd_dir: str, cache_path: str) -> Dict[str, dict]:
+def load_or_build_jd_cache(jd_dir: str, cache_path: str,
+                           keep: Optional[Callable[[str], bool]] = None) -> Dict[str, dict]:
+    """
+    ``keep(name)`` restricts the result to a subset of JDs (a shard's slice):
+    other entries are dropped while loading and never read from jd_dir. A
+    filtered build is not written back, since it is not the whole corpus.
+    """
     jd_dir_path = Path(jd_dir)
     cache_file = Path(cache_path)
     if cache_file.exists():
         try:
-            return json.loads(cache_file.read_text(encoding="utf-8"))
+            data = json.loads(cache_file.read_text(encoding="utf-8"))
+            if keep is not None:
+                data = {k: v for k, v in data.items() if keep(k)}
+            return data
         except Exception:
             pass
 
     cache: Dict[str, dict] = {}
     if jd_dir_path.exists():
         for p in jd_dir_path.iterdir():
+            if keep is not None and not keep(p.name):
+                continue
             if p.is_file() and p.suffix.lower() in {".pdf",".docx",".txt"}:
                 cache[p.name] = {"text": _read_text_any(p), "location": ""}
-    cache_file.parent.mkdir(parents=True, exist_ok=True)
-    cache_file.write_text(json.dumps(cache), encoding="utf-8")
+    if keep is None:
+        cache_file.parent.mkdir(parents=True, exist_ok=True)
+        cache_file.write_text(json.dumps(cache), encoding="utf-8")
     return cache
 
+def unique_name(name: str, taken) -> str:
+    """``name``, or ``stem (2).ext``, ``stem (3).ext``... if already in ``taken``."""
+    if name not in taken:
+        return name
+    p = Path(name)
+    n = 2
+    while f"{p.stem} ({n}){p.suffix}" in taken:
+        n += 1
+    return f"{p.stem} ({n}){p.suffix}"
+
 def build_jd_cache_from_uploads(named_bytes: List[Tuple[str, bytes]]) -> Dict[str, dict]:
-    tmpdir = Path("/tmp/jd_uploads")
-    tmpdir.mkdir(exist_ok=True, parents=True)
+    # own directory per call: concurrent requests may upload the same file name
+    import tempfile
     out: Dict[str, dict] = {}
-    for name, data in named_bytes:
-        p = tmpdir / name
-        p.write_bytes(data)
-        out[name] = {"text": _read_text_any(p), "location": ""}
+    with tempfile.TemporaryDirectory(prefix="jd_uploads_") as tmpdir:
+        for name, data in named_bytes:
+            p = Path(tmpdir) / Path(name).name
+            p.write_bytes(data)
+            # two uploads named the same are two JDs, not one
+            out[unique_name(name, out)] = {"text": _read_text_any(p), "location": ""}
     return out
 
 # --------- Fast text accessor (added) ----------
@@ -0,0 +1,401 @@
+"""
+Async load generator for the FastAPI service.
+
+Drives /upload, /download_csv and /match-fast with a weighted request mix at
+a fixed concurrency, records per-request latency, and samples the server's
+RSS while the run is in progress. Writes a JSON report that a later run can
+be compared against.
+
+    # start a local uvicorn, 8 concurrent clients for 60s
+    python loadtest.py --start-server --resumes samples/resumes --jds samples/jds \\
+        --concurrency 8 --duration 60 --out before.json
+
+    # same run after a change, compared with the first
+    python loadtest.py --start-server --resumes samples/resumes --jds samples/jds \\
+        --concurrency 8 --duration 60 --out after.json --compare before.json
+
+    # production-like server: several uvicorn workers (RSS covers all of them)
+    python loadtest.py --start-server --server-args="--workers 4" ...
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import random
+import shlex
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import httpx
+
+APP_DIR = Path(__file__).resolve().parent
+EXTS = {".pdf", ".docx", ".txt"}
+ENDPOINTS = ("upload", "download_csv", "match-fast")
+
+NamedBytes = List[Tuple[str, bytes]]
+
+# ---------- Inputs ----------
+def load_files(paths: List[str]) -> NamedBytes:
+    out: NamedBytes = []
+    for raw in paths:
+        p = Path(raw)
+        files = sorted(p.iterdir()) if p.is_dir() else [p]
+        for f in files:
+            if f.is_file() and f.suffix.lower() in EXTS:
+                out.append((f.name, f.read_bytes()))
+    return out
+
+def parse_mix(spec: str) -> Dict[str, float]:
+    mix: Dict[str, float] = {}
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition("=")
+        name = name.strip().lstrip("/")
+        if name not in ENDPOINTS:
+            raise SystemExit(f"unknown endpoint in --mix: {name!r} (expected one of {', '.join(ENDPOINTS)})")
+        mix[name] = float(weight or 1)
+    return mix
+
+def _busted(named: NamedBytes, rnd: random.Random) -> NamedBytes:
+    # a unique file name changes the request's content key (defeats the
+    # result cache) without touching the document bytes
+    tag = f"{rnd.getrandbits(48):x}"
+    out = []
+    for n, b in named:
+        p = Path(n)
+        out.append((f"{p.stem}-{tag}{p.suffix}", b))
+    return out
+
+def build_request(endpoint: str, resumes: NamedBytes, jds: NamedBytes, args, rnd: random.Random):
+    pick_jds = rnd.sample(jds, min(args.jds_per_request, len(jds)))
+    if endpoint == "match-fast":
+        pick_res = rnd.sample(resumes, min(args.resumes_per_request, len(resumes)))
+    else:
+        pick_res = [rnd.choice(resumes)]
+    if args.cache_bust:
+        pick_res = _busted(pick_res, rnd)
+    if endpoint == "match-fast":
+        files = [("resumes", nb) for nb in pick_res] + [("jds", nb) for nb in pick_jds]
+        data = {"max_workers": str(args.max_workers)} if args.max_workers else {}
+        return "/match-fast", files, data
+    files = [("resume", pick_res[0])] + [("jd_files", nb) for nb in pick_jds]
+    return f"/{endpoint}", files, {}
+
+# ---------- Server ----------
+def _port_in_use(port: int) -> bool:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        return sock.connect_ex(("127.0.0.1", port)) == 0
+
+def start_server(port: int, extra_env: Dict[str, str], extra_args: List[str]) -> subprocess.Popen:
+    # otherwise the run would measure whatever already listens there
+    if _port_in_use(port):
+        raise SystemExit(f"port {port} is already in use; stop that server or pick another --port")
+    env = {**os.environ, **extra_env}
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app_main:app", "--host", "127.0.0.1", "--port", str(port), *extra_args],
+        cwd=str(APP_DIR), env=env,
+    )
+
+def _check_alive(server: Optional[subprocess.Popen]) -> None:
+    if server is not None and server.poll() is not None:
+        raise SystemExit(f"server exited with code {server.returncode} (see its output above)")
+
+async def wait_healthy(client: httpx.AsyncClient, url: str, timeout: float,
+                       server: Optional[subprocess.Popen] = None) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        _check_alive(server)
+        try:
+            if (await client.get(f"{url}/healthz", timeout=2.0)).status_code == 200:
+                _check_alive(server)
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.25)
+    raise SystemExit(f"server at {url} not healthy after {timeout:.0f}s")
+
+def _proc_rss_kb(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/status", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1])
+    except (OSError, ValueError):
+        pass
+    return 0
+
+def _children(pid: int) -> List[int]:
+    kids: List[int] = []
+    try:
+        for tid in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{tid}/children", encoding="ascii") as f:
+                kids += [int(c) for c in f.read().split()]
+    except (OSError, ValueError):
+        pass
+    return kids
+
+def rss_mb(pid: int) -> Optional[float]:
+    """RSS of ``pid`` plus its child processes (uvicorn --workers)."""
+    try:
+        import psutil
+        proc = psutil.Process(pid)
+        procs = [proc] + proc.children(recursive=True)
+        return sum(p.memory_info().rss for p in procs) / (1024 * 1024)
+    except ImportError:
+        pass
+    except Exception:
+        return None
+    if not os.path.exists(f"/proc/{pid}"):
+        return None
+    total, stack = 0, [pid]
+    while stack:
+        p = stack.pop()
+        total += _proc_rss_kb(p)
+        stack += _children(p)
+    return total / 1024
+
+async def sample_rss(pid: int, interval: float, t0: float, out: List[Tuple[float, float]], stop: asyncio.Event):
+    while not stop.is_set():
+        mb = rss_mb(pid)
+        if mb is not None:
+            out.append((round(time.monotonic() - t0, 2), round(mb, 1)))
+        try:
+            await asyncio.wait_for(stop.wait(), timeout=interval)
+        except asyncio.TimeoutError:
+            pass
+
+# ---------- Load ----------
+async def client_loop(client, url, resumes, jds, mix, args, seed, t0, deadline, budget, records):
+    rnd = random.Random(seed)
+    names, weights = list(mix), list(mix.values())
+    while time.monotonic() < deadline:
+        if budget is not None:
+            if budget[0] <= 0:
+                return
+            budget[0] -= 1
+        endpoint = rnd.choices(names, weights)[0]
+        path, files, data = build_request(endpoint, resumes, jds, args, rnd)
+        start = time.monotonic()
+        status, error = 0, None
+        try:
+            resp = await client.post(f"{url}{path}", files=files, data=data, timeout=args.timeout)
+            await resp.aread()
+            status = resp.status_code
+            if status >= 400:
+                error = f"HTTP {status}"
+        except httpx.HTTPError as e:
+            error = type(e).__name__
+        records.append({
+            "endpoint": endpoint,
+            "t": round(start - t0, 3),
+            "latency": time.monotonic() - start,
+            "status": status,
+            "error": error,
+        })
+
+# ---------- Report ----------
+def percentile(sorted_vals: List[float], q: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    k = max(0, min(len(sorted_vals) - 1, math.ceil(q / 100.0 * len(sorted_vals)) - 1))
+    return sorted_vals[k]
+
+def summarize(records: List[dict], elapsed: float) -> dict:
+    """
+    Latency percentiles cover every request, failed ones included, so
+    timeouts make p99 worse rather than disappearing from it. Failed-request
+    latency is also reported on its own.
+    """
+    lat = sorted(r["latency"] for r in records)
+    err_lat = sorted(r["latency"] for r in records if r["error"])
+    errors = len(err_lat)
+    n = len(records)
+    return {
+        "requests": n,
+        "errors": errors,
+        "error_rate": round(errors / n, 4) if n else 0.0,
+        "throughput_rps": round((n - errors) / elapsed, 3) if elapsed > 0 else 0.0,
+        "p50_ms": round(percentile(lat, 50) * 1000, 1),
+        "p95_ms": round(percentile(lat, 95) * 1000, 1),
+        "p99_ms": round(percentile(lat, 99) * 1000, 1),
+        "mean_ms": round(sum(lat) / len(lat) * 1000, 1) if lat else 0.0,
+        "error_p50_ms": round(percentile(err_lat, 50) * 1000, 1),
+        "error_p99_ms": round(percentile(err_lat, 99) * 1000, 1),
+    }
+
+def run_config(args, mix, resumes: NamedBytes, jds: NamedBytes) -> dict:
+    """Everything that shapes the load; two reports are comparable only if these match."""
+    return {
+        "concurrency": args.concurrency,
+        "mix": mix,
+        "duration_s": args.duration,
+        "requests": args.requests,
+        "jds_per_request": args.jds_per_request,
+        "resumes_per_request": args.resumes_per_request,
+        "max_workers": args.max_workers,
+        "cache_bust": args.cache_bust,
+        "seed": args.seed,
+        "timeout_s": args.timeout,
+        "corpus": {"resumes": len(resumes), "jds": len(jds)},
+        "start_server": args.start_server,
+        "server_args": args.server_args,
+        "server_env": sorted(args.server_env),
+    }
+
+def build_report(records, elapsed, rss, args, config) -> dict:
+    mix = config["mix"]
+    by_ep = {ep: summarize([r for r in records if r["endpoint"] == ep], elapsed) for ep in mix}
+    errors: Dict[str, int] = {}
+    for r in records:
+        if r["error"]:
+            errors[r["error"]] = errors.get(r["error"], 0) + 1
+    return {
+        "label": args.label,
+        "url": args.url,
+        "config": config,
+        "elapsed_s": round(elapsed, 2),
+        "overall": summarize(records, elapsed),
+        "endpoints": by_ep,
+        "error_kinds": errors,
+        "rss_mb": {
+            "peak": max((mb for _, mb in rss), default=None),
+            "start": rss[0][1] if rss else None,
+            "end": rss[-1][1] if rss else None,
+            "samples": rss,
+        },
+    }
+
+COLS = ("requests", "error_rate", "throughput_rps", "p50_ms", "p95_ms", "p99_ms")
+
+def print_report(rep: dict) -> None:
+    print(f"\n{rep['label'] or 'run'}: {rep['url']}  concurrency={rep['config']['concurrency']}  {rep['elapsed_s']}s")
+    print(f"{'endpoint':<14}" + "".join(f"{c:>15}" for c in COLS))
+    rows = [("overall", rep["overall"])] + list(rep["endpoints"].items())
+    for name, s in rows:
+        print(f"{name:<14}" + "".join(f"{s[c]:>15}" for c in COLS))
+    rss = rep["rss_mb"]
+    if rss["peak"] is not None:
+        print(f"server RSS MB: start {rss['start']}  peak {rss['peak']}  end {rss['end']}")
+    if rep["error_kinds"]:
+        print("errors: " + ", ".join(f"{k} x{v}" for k, v in rep["error_kinds"].items()))
+
+def print_compare(rep: dict, base: dict) -> None:
+    old_cfg = base.get("config")
+    if old_cfg is None:
+        print("\nWARNING: baseline report has no run configuration; results may not be comparable")
+    else:
+        diff = [k for k in sorted(set(rep["config"]) | set(old_cfg)) if rep["config"].get(k) != old_cfg.get(k)]
+        if diff:
+            print("\nWARNING: run configuration differs from the baseline; results are not like-for-like")
+        for k in diff:
+            print(f"  {k}: baseline {old_cfg.get(k)!r}, this run {rep['config'].get(k)!r}")
+    print(f"\nvs {base.get('label') or 'baseline'} (change, lower latency / higher throughput is better)")
+    print(f"{'endpoint':<14}" + "".join(f"{c:>19}" for c in COLS[1:]))
+    rows = [("overall", rep["overall"], base.get("overall", {}))]
+    rows += [(ep, s, base.get("endpoints", {}).get(ep, {})) for ep, s in rep["endpoints"].items()]
+    for name, cur, old in rows:
+        cells = []
+        for c in COLS[1:]:
+            if c not in old:
+                cells.append(f"{'-':>19}")
+                continue
+            delta = cur[c] - old[c]
+            pct = f" ({delta / old[c] * 100:+.0f}%)" if old[c] else ""
+            cells.append(f"{f'{delta:+.4g}{pct}':>19}")
+        print(f"{name:<14}" + "".join(cells))
+    b_peak, c_peak = base.get("rss_mb", {}).get("peak"), rep["rss_mb"]["peak"]
+    if b_peak is not None and c_peak is not None:
+        print(f"peak RSS MB: {b_peak} -> {c_peak} ({c_peak - b_peak:+.1f})")
+
+# ---------- Main ----------
+async def run(args) -> dict:
+    mix = parse_mix(args.mix)
+    resumes = load_files(args.resumes)
+    jds = load_files(args.jds)
+    if not resumes or not jds:
+        raise SystemExit("need at least one resume (--resumes) and one JD (--jds)")
+
+    server = None
+    if args.start_server:
+        server = start_server(args.port, dict(e.split("=", 1) for e in args.server_env),
+                              shlex.split(args.server_args))
+    pid = server.pid if server else args.server_pid
+    try:
+        limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+        async with httpx.AsyncClient(limits=limits) as client:
+            await wait_healthy(client, args.url, args.startup_timeout, server)
+            records: List[dict] = []
+            rss: List[Tuple[float, float]] = []
+            stop = asyncio.Event()
+            t0 = time.monotonic()
+            sampler = asyncio.create_task(sample_rss(pid, args.rss_interval, t0, rss, stop)) if pid else None
+            deadline = t0 + args.duration if args.duration else float("inf")
+            budget = [args.requests] if args.requests else None
+            await asyncio.gather(*(
+                client_loop(client, args.url, resumes, jds, mix, args, args.seed + i, t0, deadline, budget, records)
+                for i in range(args.concurrency)
+            ))
+            elapsed = time.monotonic() - t0
+            stop.set()
+            _check_alive(server)  # a crash mid-run would leave only connection errors
+            if sampler:
+                await sampler
+    finally:
+        if server:
+            server.terminate()
+            try:
+                server.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                server.kill()
+    return build_report(records, elapsed, rss, args, run_config(args, mix, resumes, jds))
+
+def main(argv=None) -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--url", default=None, help="base URL (default http://127.0.0.1:<port>)")
+    ap.add_argument("--port", type=int, default=8001)
+    ap.add_argument("--start-server", action="store_true", help="launch uvicorn app_main:app locally for the run")
+    ap.add_argument("--server-env", action="append", default=[], metavar="K=V",
+                    help="extra environment for --start-server (repeatable)")
+    ap.add_argument("--server-args", default="", metavar="ARGS",
+                    help='extra uvicorn arguments for --start-server, e.g. --server-args="--workers 4"')
+    ap.add_argument("--server-pid", type=int, default=None, help="pid to sample RSS from when not using --start-server")
+    ap.add_argument("--startup-timeout", type=float, default=60.0)
+    ap.add_argument("--resumes", nargs="+", required=True, help="resume files or directories")
+    ap.add_argument("--jds", nargs="+", required=True, help="JD files or directories")
+    ap.add_argument("--mix", default="upload=1,download_csv=1,match-fast=1",
+                    help="weighted endpoint mix, e.g. upload=2,match-fast=1")
+    ap.add_argument("--concurrency", type=int, default=4)
+    ap.add_argument("--duration", type=float, default=30.0, help="seconds (0 = until --requests is reached)")
+    ap.add_argument("--requests", type=int, default=0, help="total request budget (0 = unlimited)")
+    ap.add_argument("--jds-per-request", type=int, default=3)
+    ap.add_argument("--resumes-per-request", type=int, default=3, help="for /match-fast")
+    ap.add_argument("--max-workers", type=int, default=0, help="max_workers form field for /match-fast (0 = server default)")
+    ap.add_argument("--cache-bust", action="store_true", help="give every resume upload a unique name")
+    ap.add_argument("--timeout", type=float, default=300.0, help="per-request timeout (s)")
+    ap.add_argument("--rss-interval", type=float, default=1.0)
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--label", default="")
+    ap.add_argument("--out", default=None, help="write the JSON report here")
+    ap.add_argument("--compare", default=None, help="baseline JSON report to diff against")
+    args = ap.parse_args(argv)
+    args.url = (args.url or f"http://127.0.0.1:{args.port}").rstrip("/")
+    if not args.duration and not args.requests:
+        ap.error("set --duration and/or --requests")
+
+    rep = asyncio.run(run(args))
+    print_report(rep)
+    if args.out:
+        Path(args.out).write_text(json.dumps(rep, indent=2), encoding="utf-8")
+    if args.compare:
+        print_compare(rep, json.loads(Path(args.compare).read_text(encoding="utf-8")))
+
+if __name__ == "__main__":
+    main()
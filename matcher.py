@@ -11,6 +11,8 @@ from extractors import (
     extract_text,
     extract_resume_data,
     extract_skills,
+    extract_skills_fast,
+    has_skill_vocab,
     normalize_skills,
     clean_entry_name,
 )
@@ -49,9 +51,25 @@ def _containment_match(jd_norm: set, res_norm: set) -> Tuple[set, set]:
     missing = jd_norm - matched
     return matched, missing
 
-def _jd_skill_sets(jd_entry: Dict[str, Any]):
+def _skills(text: str, fast: bool) -> List[str]:
+    """
+    fast: one scan over the SKILL_DB vocabulary instead of SkillNer/spaCy
+    (SkillNer while no vocabulary is built, rather than the noisy token
+    heuristic, since these skills drive matching).
+    """
+    if fast and has_skill_vocab():
+        return extract_skills_fast(text)
+    return extract_skills(text)
+
+def _skill_field(fast: bool) -> str:
+    # JD entries may carry precomputed skills for either mode
+    return "skills_fast" if fast else "skills"
+
+def _jd_skill_sets(jd_entry: Dict[str, Any], fast: bool = False):
     jd_text = jd_entry.get("text", "") or ""
-    base = jd_entry.get("skills") or extract_skills(jd_text) or []
+    base = jd_entry.get(_skill_field(fast))
+    if base is None:
+        base = _skills(jd_text, fast) or []
     jd_norm = normalize_skills(list(base))
     jd_map: Dict[str, str] = {}
     for s in base:
@@ -61,10 +79,10 @@ def _jd_skill_sets(jd_entry: Dict[str, Any]):
         jd_map.setdefault(k, k)
     return jd_text, jd_norm, jd_map
 
-def _compare(resume_embed, res_norm, resume_loc, jd_name, jd_entry, resume_name):
+def _compare(resume_embed, res_norm, resume_loc, jd_name, jd_entry, resume_name, fast=False):
     if not jd_entry:
         return None
-    jd_text, jd_norm, jd_map = _jd_skill_sets(jd_entry)
+    jd_text, jd_norm, jd_map = _jd_skill_sets(jd_entry, fast)
     jd_embed = torch.tensor(jd_entry["embedding"])
     score = util.pytorch_cos_sim(resume_embed, jd_embed)[0][0].item() * 100.0
     matched_keys, missing_keys = _containment_match(jd_norm, res_norm)
@@ -77,25 +95,53 @@ def _compare(resume_embed, res_norm, resume_loc, jd_name, jd_entry, resume_name)
         "matched_skills": sorted(set(matched)),
         "missing_skills": sorted(set(missing)),
         "resume_location": resume_loc,
-        "jd_location": extract_location(jd_text),
+        "jd_location": jd_entry.get("location") or extract_location(jd_text),
     }
 
 def _ensure_jd_embeddings(jd_cache: Dict[str, dict], sbert):
-    """Non-invasive: if a JD lacks an embedding, compute & attach it."""
-    import numpy as np
-    for name, entry in jd_cache.items():
-        if "embedding" not in entry or entry["embedding"] is None:
-            txt = entry.get("text", "") or ""
-            emb = sbert.encode(txt)
-            entry["embedding"] = emb.tolist() if hasattr(emb, "tolist") else emb
+    """Non-invasive: JDs lacking an embedding get one (a single batched encode)."""
+    names = [n for n, e in jd_cache.items() if e.get("embedding") is None]
+    if names:
+        embs = sbert.encode([jd_cache[n].get("text", "") or "" for n in names])
+        for n, emb in zip(names, embs):
+            jd_cache[n]["embedding"] = emb.tolist() if hasattr(emb, "tolist") else emb
+    return jd_cache
+
+def prepare_jd_cache(jd_cache: Dict[str, dict]) -> Dict[str, dict]:
+    """
+    For long-lived JD caches (the fallback corpus, a shard's slice): compute
+    once per JD what every match would otherwise recompute - embeddings,
+    skill sets for both modes and the location.
+    """
+    _, sbert = _lazy_models()
+    _ensure_jd_embeddings(jd_cache, sbert)
+    for entry in jd_cache.values():
+        text = entry.get("text", "") or ""
+        if entry.get("skills") is None:
+            entry["skills"] = extract_skills(text)
+        if entry.get("skills_fast") is None:
+            entry["skills_fast"] = _skills(text, True) if has_skill_vocab() else entry["skills"]
+        if not entry.get("location"):
+            entry["location"] = extract_location(text)
     return jd_cache
 
-def match_resume_to_jds(resume_path: str, jd_cache: Dict[str, dict]) -> List[Dict[str, Any]]:
+def match_resume_to_jds(resume_path: str, jd_cache: Dict[str, dict], *,
+                        text: str | None = None, resume_embed=None,
+                        resume_data=None, fast: bool = False) -> List[Dict[str, Any]]:
+    """
+    ``text`` / ``resume_embed`` / ``resume_data`` (extract_resume_data's
+    result) may be passed in when already computed. ``fast`` takes resume
+    and JD skills from the vocabulary scan (see _skills).
+    """
     nlp, sbert = _lazy_models()
-    text = extract_text(resume_path)
+    if text is None:
+        text = extract_text(resume_path)
     resume_name = os.path.basename(resume_path)
-    resume_embed = sbert.encode(text, convert_to_tensor=True)
-    resume_skills, edu, exp, edu_gaps, exp_gaps, edu_to_exp = extract_resume_data(text)
+    if resume_embed is None:
+        resume_embed = sbert.encode(text, convert_to_tensor=True)
+    if resume_data is None:
+        resume_data = extract_resume_data(text, skills=_skills(text, fast))
+    resume_skills, edu, exp, edu_gaps, exp_gaps, edu_to_exp = resume_data
     res_norm = normalize_skills(resume_skills)
     resume_loc = extract_location(text)
 
@@ -106,7 +152,7 @@ def match_resume_to_jds(resume_path: str, jd_cache: Dict[str, dict]) -> List[Dic
 
     for jd_name in jd_cache.keys():
         base = _compare(
-            resume_embed, res_norm, resume_loc, jd_name, jd_cache.get(jd_name), resume_name
+            resume_embed, res_norm, resume_loc, jd_name, jd_cache.get(jd_name), resume_name, fast
         )
         if not base:
             continue
@@ -134,7 +180,9 @@ def match_resume_to_jds(resume_path: str, jd_cache: Dict[str, dict]) -> List[Dic
     return out
 
 # ---------- Parallel multi-resume matcher (added) ----------
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 
 def _get_resume_text_fast(path: str) -> str:
     try:
@@ -144,36 +192,40 @@ def _get_resume_text_fast(path: str) -> str:
         from extractors import extract_text
         return extract_text(path)
 
-def _quick_skills(text: str, fast: bool) -> list[str]:
-    if fast:
-        try:
-            from extractors import extract_skills_fast
-            return extract_skills_fast(text)
-        except Exception:
-            pass
-    from extractors import extract_skills
-    return extract_skills(text)
+def _build_jd_cache(jd_paths: List[str], sbert, fast: bool = False) -> Dict[str, dict]:
+    """Transient JD cache with skills (once per JD, not per resume) and embeddings, encoded in one batch."""
+    from jd_cache import get_jd_text_fast, unique_name
+    jd_cache: Dict[str, dict] = {}
+    for jp in jd_paths:
+        jt = get_jd_text_fast(jp)
+        jd_cache[unique_name(os.path.basename(jp), jd_cache)] = {
+            "text": jt, "location": "", _skill_field(fast): _skills(jt or "", fast),
+        }
+    names = list(jd_cache)
+    if names:
+        embs = sbert.encode([jd_cache[n]["text"] or "" for n in names])
+        for n, emb in zip(names, embs):
+            jd_cache[n]["embedding"] = emb.tolist() if hasattr(emb, "tolist") else emb
+    return jd_cache
 
 def _match_one_resume_against_jds(resume_path: str, jd_paths: List[str], fast: bool) -> dict:
-    from jd_cache import get_jd_text_fast
     _, sbert = _lazy_models()
+    return _resume_block(resume_path, _build_jd_cache(jd_paths, sbert, fast), fast)
 
-    # Build a transient JD cache (with embeddings) once for this batch
-    jd_cache: Dict[str, dict] = {}
-    for jp in jd_paths:
-        jt = get_jd_text_fast(jp)
-        jd_cache[os.path.basename(jp)] = {"text": jt, "location": ""}
+def _resume_block(resume_path: str, jd_cache: Dict[str, dict], fast: bool,
+                  text: str | None = None, resume_embed=None) -> dict:
+    if text is None:
+        text = _get_resume_text_fast(resume_path)
 
-    _ensure_jd_embeddings(jd_cache, sbert)
+    # resume data once, shared by the scorer and the top-level fields
+    data = extract_resume_data(text, skills=_skills(text, fast))
 
     # Reuse your original scorer
-    results = match_resume_to_jds(resume_path, jd_cache)
+    results = match_resume_to_jds(resume_path, jd_cache, text=text, resume_embed=resume_embed,
+                                  resume_data=data, fast=fast)
 
     # Also expose top-level resume skills/periods quickly if needed by UI
-    text = _get_resume_text_fast(resume_path)
-    skills, edu, exp, edu_gaps, exp_gaps, edu_to_exp = extract_resume_data(text)
-    if fast and not skills:
-        skills = _quick_skills(text, fast=True)
+    skills, edu, exp, edu_gaps, exp_gaps, edu_to_exp = data
     return {
         "resume": os.path.basename(resume_path),
         "results": results,
@@ -193,21 +245,152 @@ def _match_one_resume_against_jds(resume_path: str, jd_paths: List[str], fast: b
         "education_to_first_job_gap_months": edu_to_exp,
     }
 
-def match_many(resume_paths: List[str], jd_paths: List[str], fast: bool = True, max_workers: int = 4) -> List[dict]:
+class _BatchProgress:
+    """
+    Shared between one batch task and match_many's timeout loop: the step
+    running now and the blocks finished so far. Once abandoned, the task
+    stops after its current step and its later blocks are dropped.
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.step: Tuple[List[str], float, float] | None = None  # (paths, started, budget)
+        self.blocks: Dict[str, dict] = {}
+        self.abandoned = False
+
+    def begin(self, paths: List[str], budget: float, spent: float = 0.0) -> bool:
+        with self.lock:
+            if self.abandoned:
+                return False
+            self.step = (list(paths), time.monotonic() - spent, budget)
+            return True
+
+    def publish(self, rp: str, block: dict) -> None:
+        with self.lock:
+            if not self.abandoned:
+                self.blocks[rp] = block
+                self.step = None
+
+def _error_block(rp: str, error: str) -> dict:
+    return {"resume": os.path.basename(rp), "error": error, "results": []}
+
+def _match_batch(batch: List[str], jd_cache: Dict[str, dict], fast: bool,
+                 progress: _BatchProgress, budgets: Dict[str, float]) -> None:
+    """
+    One scheduled task: its readable resumes share a single embedding call.
+    Each resume's block is published as soon as it is done; failures and
+    timeouts are per resume, as when each resume was its own task.
+    """
+    _, sbert = _lazy_models()
+    texts: Dict[str, str] = {}
+    spent: Dict[str, float] = {}
+    for rp in batch:
+        if not progress.begin([rp], budgets[rp]):
+            return
+        t0 = time.monotonic()
+        try:
+            texts[rp] = _get_resume_text_fast(rp)
+            spent[rp] = time.monotonic() - t0
+        except Exception as e:
+            progress.publish(rp, _error_block(rp, str(e)))
+    ok = list(texts)
+    embeds = [None] * len(ok)  # None: match_resume_to_jds encodes the resume itself
+    if len(ok) > 1:
+        if not progress.begin(ok, sum(budgets[rp] for rp in ok)):
+            return
+        try:
+            embeds = sbert.encode([texts[rp] for rp in ok], convert_to_tensor=True)
+        except Exception:
+            pass
+    for rp, emb in zip(ok, embeds):
+        if not progress.begin([rp], budgets[rp], spent[rp]):
+            return
+        try:
+            block = _resume_block(rp, jd_cache, fast, text=texts[rp], resume_embed=emb)
+        except Exception as e:
+            block = _error_block(rp, str(e))
+        progress.publish(rp, block)
+
+def match_many(resume_paths: List[str], jd_paths: List[str], fast: bool = True,
+               max_workers: int | None = None, task_timeout: float | None = None, *,
+               jd_cache: Dict[str, dict] | None = None) -> List[dict]:
     """
     Parallel, cached matching for multiple resumes x multiple JDs.
-    - fast=True: uses cached text and lightweight skill extraction for speed.
-    Returns a list of objects, one per resume, each containing its JD results.
+    - fast=True: uses cached text, and skills for resumes and JDs come from
+      the SKILL_DB vocabulary scan instead of SkillNer/spaCy.
+    - JD embeddings are computed once for the whole call; a prepared
+      ``jd_cache`` (see prepare_jd_cache) may be given instead of jd_paths.
+    - Resumes are scheduled longest-first by estimated cost; small ones are
+      micro-batched (see scheduler.py). max_workers caps the worker count
+      picked from CPUs/memory (None or 0 = auto).
+    - A resume running longer than its budget (task_timeout, scaled by its
+      estimated cost) is reported as timed out. Resumes already finished in
+      its batch keep their results; the rest of the batch is re-run one by
+      one on a replacement thread.
+    Returns a list of objects, one per resume (input order), each containing its JD results.
     """
-    if not resume_paths or not jd_paths:
+    if not resume_paths or (not jd_paths and jd_cache is None):
         return []
-    out: List[dict] = []
-    with ThreadPoolExecutor(max_workers=max_workers) as ex:
-        futs = {ex.submit(_match_one_resume_against_jds, rp, jd_paths, fast): rp for rp in resume_paths}
-        for f in as_completed(futs):
-            try:
-                out.append(f.result())
-            except Exception as e:
-                rp = futs[f]
-                out.append({"resume": os.path.basename(rp), "error": str(e), "results": []})
-    return out
+    from scheduler import plan_batches, auto_workers, track_abandoned, estimate_cost, timeout_for, TASK_TIMEOUT
+    timeout = TASK_TIMEOUT if task_timeout is None else task_timeout
+
+    if jd_cache is None:
+        _, sbert = _lazy_models()
+        jd_cache = _build_jd_cache(jd_paths, sbert, fast)
+    costs = {rp: estimate_cost(rp) for rp in resume_paths}
+    budgets = {rp: timeout_for(c, timeout) for rp, c in costs.items()}
+    batches = plan_batches(resume_paths, costs)
+
+    by_path: Dict[str, dict] = {}
+    tasks: Dict[Any, Tuple[List[str], _BatchProgress]] = {}
+
+    def submit(executor, batch):
+        progress = _BatchProgress()
+        f = executor.submit(_match_batch, batch, jd_cache, fast, progress, budgets)
+        tasks[f] = (batch, progress)
+        return f
+
+    ex = ThreadPoolExecutor(max_workers=auto_workers(len(batches), max_workers))
+    spares: List[ThreadPoolExecutor] = []
+    try:
+        pending = {submit(ex, batch) for batch, _cost in batches}
+        while pending:
+            done, pending = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+            for f in done:
+                batch, progress = tasks.pop(f)
+                with progress.lock:
+                    by_path.update(progress.blocks)
+                try:
+                    f.result()
+                    error = "no result"
+                except Exception as e:
+                    error = str(e)
+                for rp in batch:
+                    by_path.setdefault(rp, _error_block(rp, error))
+            if not timeout:
+                continue
+            now = time.monotonic()
+            for f in list(pending):
+                batch, progress = tasks[f]
+                with progress.lock:
+                    step = progress.step
+                    if step is None or now - step[1] <= step[2]:
+                        continue
+                    progress.abandoned = True
+                    by_path.update(progress.blocks)
+                pending.discard(f)
+                del tasks[f]
+                track_abandoned(f)
+                paths, _started, budget = step
+                if len(paths) == 1:
+                    by_path[paths[0]] = _error_block(paths[0], f"timed out after {budget:g}s")
+                rest = [rp for rp in batch if rp not in by_path]
+                if rest:
+                    # the stuck thread keeps its worker; run the rest beside it
+                    spare = ThreadPoolExecutor(max_workers=1)
+                    spares.append(spare)
+                    pending.update(submit(spare, [rp]) for rp in rest)
+    finally:
+        # don't wait for timed-out tasks; their threads finish in the background
+        for e in [ex, *spares]:
+            e.shutdown(wait=False, cancel_futures=True)
+    return [by_path[rp] for rp in resume_paths if rp in by_path]
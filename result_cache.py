@@ -0,0 +1,124 @@
+"""
+Single-flight result cache for the match endpoints.
+
+Results are keyed by content hashes of the uploaded resumes/JDs (or the
+version of the fallback corpus) plus the mode. Concurrent identical requests
+await the same in-flight computation (run off the event loop), and finished
+results are kept in a bounded TTL/LRU map so retries, double-clicks and the
+match -> CSV flow are served without recomputing. Results that contain
+error blocks are never cached. Responses carry the key as their ETag; while
+the result is cached, a matching If-None-Match gets 304.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+NamedBytes = List[Tuple[str, bytes]]
+
+def content_key(mode: str, resumes: NamedBytes, jds: Optional[NamedBytes], corpus: str = "") -> str:
+    """
+    Order-sensitive: result rows follow upload order and carry file names.
+    ``jds`` None means the fallback corpus, identified by its ``corpus`` version.
+    """
+    h = hashlib.sha256(mode.encode("utf-8"))
+    for tag, group in (("R", resumes), ("J", jds)):
+        if group is None:
+            h.update(f"\0{tag}:fallback:{corpus}".encode("utf-8"))
+            continue
+        for name, data in group:
+            h.update(f"\0{tag}:{name}\0".encode("utf-8"))
+            h.update(hashlib.sha256(data).digest())
+    return h.hexdigest()
+
+def etag_for(key: str, variant: str) -> str:
+    return f'"{key[:32]}-{variant}"'
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = [t.strip() for t in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+def has_errors(value: Any) -> bool:
+    """True for an error block, or a list containing one (e.g. a timed-out resume)."""
+    if isinstance(value, dict):
+        return bool(value.get("error") or value.get("errors"))
+    if isinstance(value, list):
+        return any(isinstance(v, dict) and (v.get("error") or v.get("errors")) for v in value)
+    return False
+
+class ResultCache:
+    """
+    Thread-safe, and not bound to one event loop: computations run on a
+    plain executor and every waiter awaits its own wrapper of the shared
+    concurrent future.
+    """
+    def __init__(self, maxsize: int = 128, ttl: float = 600.0, workers: Optional[int] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._done: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self._inflight: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="result-cache")
+
+    def get(self, key: str) -> Optional[Any]:
+        with self._lock:
+            return self._get_locked(key)
+
+    def _get_locked(self, key: str) -> Optional[Any]:
+        hit = self._done.get(key)
+        if hit is None:
+            return None
+        expires, value = hit
+        if expires < time.monotonic():
+            del self._done[key]
+            return None
+        self._done.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        if self.maxsize <= 0 or has_errors(value):
+            return
+        with self._lock:
+            self._done[key] = (time.monotonic() + self.ttl, value)
+            self._done.move_to_end(key)
+            while len(self._done) > self.maxsize:
+                self._done.popitem(last=False)
+
+    async def get_or_compute(self, key: str, fn: Callable[..., Any], *args, store: bool = True) -> Any:
+        """
+        Cached value, else join the in-flight computation for ``key``, else
+        start it. A caller that disconnects does not cancel the computation
+        for the others. ``store=False`` only coalesces; the caller caches the
+        parts it wants itself.
+        """
+        with self._lock:
+            value = self._get_locked(key)
+            if value is not None:
+                return value
+            fut = self._inflight.get(key)
+            if fut is None:
+                fut = self._executor.submit(fn, *args)
+                self._inflight[key] = fut
+                fut.add_done_callback(lambda f: self._finish(key, f, store))
+        return await asyncio.shield(asyncio.wrap_future(fut))
+
+    def _finish(self, key: str, fut: Future, store: bool) -> None:
+        with self._lock:
+            self._inflight.pop(key, None)
+        if fut.cancelled() or fut.exception() is not None:
+            return  # failures are not cached; the next request retries
+        if store:
+            self.put(key, fut.result())  # put() skips results with error blocks
+
+result_cache = ResultCache(
+    maxsize=int(os.environ.get("RESULT_CACHE_SIZE", "128")),
+    ttl=float(os.environ.get("RESULT_CACHE_TTL", "600")),
+)
@@ -0,0 +1,124 @@
+"""
+Cost-aware planning for match_many.
+
+Costs are rough "page equivalents" estimated from file type, size and PDF
+page count. Large documents get their own task and are dispatched first;
+small ones are packed into micro-batches that share one embedding call.
+
+Worker limits: tasks are threads in one process, so the SentenceTransformer
+and spaCy models are loaded once and shared; they are not part of the
+per-worker budget. WORKER_MEM_MB is the headroom one running task needs on
+top of that (document text, spaCy/SkillNer docs, encode activations for a
+micro-batch). It is a rough default, tune it per deployment. Timed-out tasks
+keep their thread until they finish and still count against the CPUs.
+
+Timeouts are per resume: TASK_TIMEOUT covers a document of up to
+TIMEOUT_BASE_COST page equivalents and grows linearly with cost beyond that,
+so a long PDF is not held to the budget of a one-page TXT.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from concurrent.futures import Future
+from typing import Dict, List, Optional, Tuple
+
+SMALL_COST = float(os.environ.get("MATCH_SMALL_COST", "2"))      # <= this is batched
+BATCH_COST = float(os.environ.get("MATCH_BATCH_COST", "6"))      # budget per micro-batch
+MAX_BATCH = int(os.environ.get("MATCH_MAX_BATCH", "16"))
+WORKER_MEM_MB = int(os.environ.get("MATCH_WORKER_MEM_MB", "200"))  # per running task, models excluded
+TASK_TIMEOUT = float(os.environ.get("MATCH_TASK_TIMEOUT", "120"))  # per resume, see timeout_for
+TIMEOUT_BASE_COST = float(os.environ.get("MATCH_TIMEOUT_BASE_COST", "10"))
+
+def estimate_cost(path: str) -> float:
+    try:
+        size = os.path.getsize(path)
+    except OSError:
+        return 1.0
+    p = path.lower()
+    if p.endswith(".pdf"):
+        try:
+            import fitz
+            doc = fitz.open(path)
+            try:
+                pages = doc.page_count
+            finally:
+                doc.close()
+            return max(1.0, pages + size / 1_000_000)
+        except Exception:
+            return max(1.0, size / 100_000)
+    if p.endswith(".docx"):
+        return max(0.5, size / 40_000)
+    return max(0.25, size / 4_000)
+
+def timeout_for(cost: float, timeout: float) -> float:
+    return timeout * max(1.0, cost / TIMEOUT_BASE_COST)
+
+def plan_batches(paths: List[str], costs: Optional[Dict[str, float]] = None) -> List[Tuple[List[str], float]]:
+    """[(paths, total_cost), ...] ordered longest-first. ``costs`` avoids re-estimating."""
+    costs = costs if costs is not None else {p: estimate_cost(p) for p in paths}
+    costed = sorted(((costs[p], p) for p in paths), reverse=True)
+    batches: List[Tuple[List[str], float]] = []
+    cur: List[str] = []
+    cur_cost = 0.0
+    for cost, p in costed:
+        if cost > SMALL_COST:
+            batches.append(([p], cost))
+            continue
+        if cur and (cur_cost + cost > BATCH_COST or len(cur) >= MAX_BATCH):
+            batches.append((cur, cur_cost))
+            cur, cur_cost = [], 0.0
+        cur.append(p)
+        cur_cost += cost
+    if cur:
+        batches.append((cur, cur_cost))
+    batches.sort(key=lambda b: b[1], reverse=True)
+    return batches
+
+def _available_cpus() -> int:
+    try:
+        return len(os.sched_getaffinity(0))
+    except (AttributeError, OSError):
+        return os.cpu_count() or 1
+
+def _available_mem_mb() -> Optional[int]:
+    # MemAvailable counts reclaimable page cache; MemFree (SC_AVPHYS_PAGES) does not
+    try:
+        with open("/proc/meminfo", encoding="ascii") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) // 1024
+    except (OSError, ValueError):
+        pass
+    try:
+        return os.sysconf("SC_AVPHYS_PAGES") * os.sysconf("SC_PAGE_SIZE") // (1024 * 1024)
+    except (AttributeError, ValueError, OSError):
+        return None
+
+# Timed-out tasks that match_many stopped waiting for but are still running.
+_abandoned = 0
+_abandoned_lock = threading.Lock()
+
+def track_abandoned(fut: Future) -> None:
+    global _abandoned
+    with _abandoned_lock:
+        _abandoned += 1
+    fut.add_done_callback(_release_abandoned)
+
+def _release_abandoned(_fut: Future) -> None:
+    global _abandoned
+    with _abandoned_lock:
+        _abandoned -= 1
+
+def auto_workers(n_tasks: int, requested: Optional[int] = None) -> int:
+    """
+    Bounded by CPUs not held by abandoned tasks, available memory and the
+    number of tasks; ``requested`` is a cap.
+    """
+    n = min(_available_cpus() - _abandoned, max(1, n_tasks))
+    mem = _available_mem_mb()
+    if mem is not None:
+        n = min(n, max(1, mem // WORKER_MEM_MB))
+    if requested and requested > 0:
+        n = min(n, requested)
+    return max(1, n)
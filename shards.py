@@ -0,0 +1,145 @@
+"""
+Scatter-gather matching across several worker processes/nodes.
+
+Every node runs the same ``app_main:app``. A worker started with
+``SHARD_INDEX`` / ``SHARD_COUNT`` loads only its slice of the fallback JD
+corpus (with embeddings computed once, on first use). The coordinator is
+any node with ``MATCH_SHARD_URLS`` set; ``/match-sharded`` posts to each
+worker's ``/shard/match`` and merges the per-shard results:
+
+- JDs uploaded: the resumes are split round-robin, each shard gets its resume
+  slice plus all JDs, so every resume is processed exactly once.
+- no JDs: every shard gets all resumes and matches them against its own
+  corpus slice. URL order must follow SHARD_INDEX and each worker's
+  SHARD_COUNT must equal the number of URLs; mismatches are reported.
+
+A shard returns one block per resume it was sent, in the order sent; blocks
+are merged by the resume's input position, so resumes sharing a file name
+stay separate.
+
+Local example (two workers + one coordinator):
+
+    SHARD_INDEX=0 SHARD_COUNT=2 uvicorn app_main:app --port 8101
+    SHARD_INDEX=1 SHARD_COUNT=2 uvicorn app_main:app --port 8102
+    MATCH_SHARD_URLS=http://127.0.0.1:8101,http://127.0.0.1:8102 \
+        uvicorn app_main:app --port 8001
+"""
+from __future__ import annotations
+
+import hashlib
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+NamedBytes = List[Tuple[str, bytes]]
+T = TypeVar("T")
+
+# ---------- Configuration ----------
+def shard_urls() -> List[str]:
+    raw = os.environ.get("MATCH_SHARD_URLS", "")
+    return [u.strip().rstrip("/") for u in raw.split(",") if u.strip()]
+
+def local_shard() -> Tuple[int, int]:
+    """(index, count) of this worker; (0, 1) when not sharded."""
+    try:
+        count = max(1, int(os.environ.get("SHARD_COUNT", "1")))
+        index = int(os.environ.get("SHARD_INDEX", "0")) % count
+    except ValueError:
+        return 0, 1
+    return index, count
+
+# ---------- Partitioning ----------
+def shard_of(name: str, count: int) -> int:
+    # stable across processes (unlike hash()), so every node agrees
+    digest = hashlib.blake2b(name.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big") % max(1, count)
+
+def partition(items: Sequence[T], count: int) -> List[Sequence[T]]:
+    """Round-robin split for per-request work; balance matters, placement doesn't."""
+    return [items[i::max(1, count)] for i in range(max(1, count))]
+
+def shard_filter(index: int, count: int) -> Optional[Callable[[str], bool]]:
+    """Predicate for load_or_build_jd_cache(keep=...); None when unsharded."""
+    if count <= 1:
+        return None
+    return lambda name: shard_of(name, count) == index
+
+# ---------- Merge ----------
+def merge_results(per_shard: List[List[Tuple[int, dict]]], top_k: int = 0) -> List[dict]:
+    """
+    Merge per-shard ``match_many``-shaped blocks, each tagged with its
+    resume's input index, into one block per resume in input order. JD rows
+    are concatenated and re-ranked by score; resume-level fields come from
+    the first successful block for that resume.
+    """
+    merged: Dict[int, dict] = {}
+    filled = set()
+    for blocks in per_shard:
+        for idx, block in blocks or []:
+            cur = merged.setdefault(idx, {"resume": block.get("resume", ""), "results": []})
+            cur["results"].extend(block.get("results") or [])
+            if block.get("error"):
+                cur.setdefault("errors", []).append(block["error"])
+            elif idx not in filled:
+                filled.add(idx)
+                cur.update({k: v for k, v in block.items() if k not in ("results", "error")})
+    for cur in merged.values():
+        cur["results"].sort(key=lambda r: r.get("similarity_score_percent") or 0, reverse=True)
+        if top_k > 0:
+            del cur["results"][top_k:]
+    return [merged[i] for i in sorted(merged)]
+
+# ---------- Scatter ----------
+def _post_shard(url: str, resumes: NamedBytes, jds: Optional[NamedBytes],
+                max_workers: int, timeout: float) -> dict:
+    import httpx
+    files = [("resumes", (n, b)) for n, b in resumes]
+    files += [("jds", (n, b)) for n, b in (jds or [])]
+    resp = httpx.post(
+        f"{url}/shard/match",
+        files=files,
+        data={"max_workers": str(max_workers)},
+        timeout=timeout,
+    )
+    resp.raise_for_status()
+    return resp.json()
+
+def scatter_match(resumes: NamedBytes, jds: Optional[NamedBytes], urls: List[str],
+                  max_workers: int = 0, top_k: int = 0, timeout: float = 300.0) -> List[dict]:
+    """
+    Fan the request out to ``urls`` and gather the merged top results.
+    - jds given: resumes are dealt round-robin; each shard gets its slice and all JDs.
+    - jds empty: every shard matches all resumes against its own slice of the
+      fallback corpus; the shard's reported (index, count) is checked.
+    A failing shard contributes an error entry instead of failing the request.
+    """
+    if not resumes or not urls:
+        return []
+    everyone = list(range(len(resumes)))
+    if jds:
+        slices = partition(everyone, len(urls))
+        targets = [(i, u, s) for i, (u, s) in enumerate(zip(urls, slices)) if s]
+    else:
+        targets = [(i, u, everyone) for i, u in enumerate(urls)]
+
+    def run(target):
+        pos, url, idxs = target
+        try:
+            body = _post_shard(url, [resumes[i] for i in idxs], jds, max_workers, timeout)
+            if not jds:
+                index, count = (body.get("shard") or [0, 1])[:2]
+                if (index, count) != (pos, len(urls)):
+                    raise RuntimeError(
+                        f"shard reports SHARD_INDEX={index} SHARD_COUNT={count}, "
+                        f"expected {pos} of {len(urls)}"
+                    )
+            blocks = body.get("results") or []
+            if len(blocks) != len(idxs):
+                raise RuntimeError(f"shard returned {len(blocks)} results for {len(idxs)} resumes")
+            return list(zip(idxs, blocks))
+        except Exception as e:
+            return [(i, {"resume": resumes[i][0], "error": f"{url}: {e}", "results": []}) for i in idxs]
+
+    with ThreadPoolExecutor(max_workers=len(targets) or 1) as ex:
+        per_shard = list(ex.map(run, targets))
+    return merge_results(per_shard, top_k=top_k)
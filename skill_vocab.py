@@ -0,0 +1,116 @@
+"""
+Token trie compiled from SkillNer's SKILL_DB surface forms.
+
+The trie is built once (``python skill_vocab.py``) and stored as JSON next to
+this file, so the fast skill extractor can load it without importing spaCy
+or SkillNer and find skills with one left-to-right longest-match scan.
+"""
+from __future__ import annotations
+
+import json
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+VOCAB_PATH = Path(os.environ.get("SKILL_VOCAB_PATH", Path(__file__).resolve().parent / "skill_vocab.json"))
+
+_END = "\0"  # terminal marker: value is the canonical SKILL_DB name
+# SkillNer's cleaner turns . - / ( ) , : ! ' ? into spaces on both sides
+# (general_params.LIST_PUNCTUATIONS), so SKILL_DB has "node js", "ci cd";
+# splitting on them here makes "Node.js" and "CI/CD" match those forms.
+_TOKEN = re.compile(r"[\w\+#]+")
+
+# one-token forms that are ordinary words in resumes rather than skills
+_STOP = set("""
+a an the and or for with of on in to from by about into over than after before during under again further then once here there all any both each few more most other some such no nor not only own same so too very
+is are was were be been have has had do does did will can may work team year years
+""".split())
+# one-character forms that are real skills (languages); all others are noise
+_SHORT_SKILLS = {"c", "r"}
+
+def tokens(text: str) -> List[str]:
+    return [t.lower() for t in _TOKEN.findall(text or "")]
+
+def _surface_forms(entry: dict) -> Iterable[str]:
+    high = entry.get("high_surfce_forms") or {}
+    if isinstance(high, dict):
+        yield from (v for v in high.values() if isinstance(v, str))
+    for low in entry.get("low_surface_forms") or []:
+        if isinstance(low, str):
+            yield low
+
+def compile_vocab(skill_db: Dict[str, dict]) -> dict:
+    """
+    Full and low surface forms of every entry. ``match_on_tokens`` skills are
+    included too; only SkillNer's extra partial per-token matching is not
+    reproduced.
+    """
+    trie: dict = {}
+    for entry in skill_db.values():
+        if not isinstance(entry, dict):
+            continue
+        name = entry.get("skill_name") or ""
+        for form in _surface_forms(entry):
+            toks = tokens(form)
+            if not toks:
+                continue
+            if len(toks) == 1 and ((len(toks[0]) < 2 and toks[0] not in _SHORT_SKILLS) or toks[0] in _STOP):
+                continue
+            node = trie
+            for t in toks:
+                node = node.setdefault(t, {})
+            node.setdefault(_END, name or form)
+    return trie
+
+def save_vocab(trie: dict, path: Path = VOCAB_PATH) -> None:
+    path.write_text(json.dumps(trie, separators=(",", ":")), encoding="utf-8")
+
+def load_vocab(path: Path = VOCAB_PATH) -> Optional[dict]:
+    try:
+        return json.loads(path.read_text(encoding="utf-8"))
+    except Exception:
+        return None
+
+def build_from_skillner(path: Path = VOCAB_PATH) -> dict:
+    from skillNer.general_params import SKILL_DB
+    trie = compile_vocab(SKILL_DB)
+    save_vocab(trie, path)
+    return trie
+
+def scan(trie: dict, text: str) -> List[str]:
+    """
+    Longest match at each position, then jump past it. Returns the matched
+    document spans with their original case (like SkillNer's
+    ``doc_node_value``), first occurrence only.
+    """
+    text = text or ""
+    toks = list(_TOKEN.finditer(text))
+    out: List[str] = []
+    seen = set()
+    i, n = 0, len(toks)
+    while i < n:
+        node, j, last = trie, i, -1
+        while j < n:
+            node = node.get(toks[j].group().lower())
+            if node is None:
+                break
+            if _END in node:
+                last = j
+            j += 1
+        if last < 0:
+            i += 1
+            continue
+        span = text[toks[i].start():toks[last].end()]
+        key = " ".join(t.group().lower() for t in toks[i:last + 1])  # "c++" and "c" differ
+        if key not in seen:
+            seen.add(key)
+            out.append(span)
+        i = last + 1
+    return out
+
+if __name__ == "__main__":
+    out = Path(sys.argv[1]) if len(sys.argv) > 1 else VOCAB_PATH
+    trie = build_from_skillner(out)
+    print(f"wrote {out} ({len(trie)} root tokens)")